@@ -13,8 +13,9 @@ app = Flask(__name__)
 
 # Состояние текущей задачи
 _log_queue: Queue = Queue()
-_stop_event = threading.Event()
+_stop_event = core.stop_event  # проверяется ядром перед каждым запросом к API
 _worker_thread: threading.Thread | None = None
+_last_report: core.RunReport | None = None
 
 
 class QueueWriter:
@@ -32,7 +33,9 @@ class QueueWriter:
 
 
 def run_worker(token: str, old_link: str, new_link: str, communities: list[str]) -> None:
-    global _stop_event
+    global _stop_event, _last_report
+    # Пока не создан отчёт этого запуска, /api/report не должен отдавать прошлый
+    _last_report = None
     logger = QueueWriter(_log_queue)
     old_stdout, old_stderr = sys.stdout, sys.stderr
     sys.stdout = sys.stderr = logger
@@ -51,15 +54,21 @@ def run_worker(token: str, old_link: str, new_link: str, communities: list[str])
             return
 
         _log_queue.put(f"\n🔍 Начинаем обработку {len(communities)} сообществ...\n")
+        report = core.RunReport(old_link, new_link)
+        _last_report = report
         for comm in communities:
             if _stop_event.is_set():
                 _log_queue.put("\n⏹ Операция остановлена пользователем.\n")
                 break
             try:
-                core.process_community(comm, old_link, new_link)
+                core.process_community(comm, old_link, new_link, report.add_community(comm))
+            except core.OperationStopped:
+                _log_queue.put("\n⏹ Операция остановлена пользователем.\n")
+                break
             except Exception as e:
                 _log_queue.put(f"❌ Ошибка при обработке {comm}: {e}\n")
-        _log_queue.put("\n🎉 Работа завершена!\n")
+        report.finish()
+        _log_queue.put("\n🎉 Работа завершена! Отчёт: /api/report\n")
     finally:
         sys.stdout, sys.stderr = old_stdout, old_stderr
         _log_queue.put("\x00")  # сигнал конца потока
@@ -125,12 +134,33 @@ def api_run():
 
 @app.route("/api/stop", methods=["POST"])
 def api_stop():
-    """Запрос остановки текущей задачи (между сообществами)."""
+    """Запрос остановки текущей задачи (вступает в силу до следующего запроса к API)."""
     global _stop_event
     _stop_event.set()
     return {"ok": True}
 
 
+@app.route("/api/report", methods=["GET"])
+def api_report():
+    """Отчёт о текущем или последнем запуске. ?format=csv — CSV, иначе JSON."""
+    if _last_report is None:
+        return {"error": "Отчёт ещё не сформирован"}, 404
+
+    if request.args.get("format") == "csv":
+        return Response(
+            _last_report.to_csv(),
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=report.csv"},
+        )
+    return _last_report.to_dict()
+
+
+@app.route("/api/transport", methods=["GET"])
+def api_transport():
+    """Статистика HTTP-транспорта: размер пула, открытые и переиспользованные соединения."""
+    return core.get_transport_stats()
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -1,15 +1,20 @@
 import sys
-from typing import List, Optional
+from collections import deque
+from typing import Any, List, Optional
 
-from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
 from PyQt6.QtWidgets import (
     QApplication,
     QHBoxLayout,
+    QHeaderView,
     QLabel,
     QLineEdit,
     QMainWindow,
     QMessageBox,
+    QPlainTextEdit,
     QPushButton,
+    QTableView,
     QTextEdit,
     QVBoxLayout,
     QWidget,
@@ -18,27 +23,130 @@ from PyQt6.QtWidgets import (
 import vk_link_rewriter as core
 
 
-class StreamToSignal:
-    """Поток для перенаправления print() в сигнал Qt."""
+# Сколько кусков print() держим до отрисовки и сколько строк хранит окно лога
+LOG_BUFFER_CHUNKS = 20000
+LOG_VIEW_MAX_LINES = 5000
+LOG_FLUSH_INTERVAL_MS = 200
 
-    def __init__(self, signal):
-        self.signal = signal
+
+class LogBuffer:
+    """Ограниченный буфер лога: пишет рабочий поток, забирает таймер GUI.
+
+    deque.append / popleft потокобезопасны, поэтому блокировка не нужна.
+    При переполнении отбрасываются самые старые куски.
+    """
+
+    def __init__(self, maxlen: int = LOG_BUFFER_CHUNKS) -> None:
+        self._chunks: deque = deque(maxlen=maxlen)
 
     def write(self, text: str) -> None:
         text = str(text)
         if not text:
             return
-        self.signal.emit(text)
+        self._chunks.append(text)
 
     def flush(self) -> None:
         # Ничего делать не нужно, но метод должен быть
         pass
 
+    def drain(self) -> str:
+        parts = []
+        while True:
+            try:
+                parts.append(self._chunks.popleft())
+            except IndexError:
+                break
+        return "".join(parts)
+
+
+class CommunityProgressModel(QAbstractTableModel):
+    """Таблица прогресса по сообществам."""
+
+    COLUMNS = (
+        ("community", "Сообщество"),
+        ("status", "Статус"),
+        ("posts", "Постов"),
+        ("comments", "Комментариев"),
+        ("edits", "Правок"),
+        ("failures", "Ошибок"),
+        ("waits", "Ожиданий лимита"),
+    )
+
+    # Событие ядра -> колонка таблицы
+    EVENT_FIELDS = {
+        "post_scanned": "posts",
+        "comment_scanned": "comments",
+        "post_edited": "edits",
+        "comment_edited": "edits",
+        "edit_failed": "failures",
+        "fetch_failed": "failures",
+        "rate_limit_wait": "waits",
+    }
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._rows: List[dict] = []
+
+    def reset(self, communities: List[str]) -> None:
+        self.beginResetModel()
+        self._rows = [
+            {
+                "community": comm,
+                "status": "ожидает",
+                "posts": 0,
+                "comments": 0,
+                "edits": 0,
+                "failures": 0,
+                "waits": 0,
+            }
+            for comm in communities
+        ]
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        key = self.COLUMNS[index.column()][0]
+        return self._rows[index.row()][key]
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][1]
+        return section + 1
+
+    def set_status(self, row: int, status: str) -> None:
+        self._set(row, "status", status)
+
+    def add_event(self, row: int, event: str, amount: int) -> None:
+        key = self.EVENT_FIELDS.get(event)
+        if key is None or not 0 <= row < len(self._rows):
+            return
+        self._set(row, key, self._rows[row][key] + amount)
+
+    def _set(self, row: int, key: str, value: Any) -> None:
+        if not 0 <= row < len(self._rows):
+            return
+        self._rows[row][key] = value
+        column = [name for name, _ in self.COLUMNS].index(key)
+        index = self.index(row, column)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
 
 class Worker(QThread):
-    log = pyqtSignal(str)
     finished = pyqtSignal()
     error = pyqtSignal(str)
+    # строка таблицы, событие ядра, количество
+    progress = pyqtSignal(int, str, int)
+    # строка таблицы, статус
+    status = pyqtSignal(int, str)
 
     def __init__(
         self,
@@ -46,6 +154,7 @@ class Worker(QThread):
         old_link: str,
         new_link: str,
         communities: List[str],
+        log_buffer: LogBuffer,
         parent=None,
     ) -> None:
         super().__init__(parent)
@@ -53,17 +162,23 @@ class Worker(QThread):
         self.old_link = old_link
         self.new_link = new_link
         self.communities = communities
-        self._stopped = False
+        self.log_buffer = log_buffer
+        self._row = -1
 
     def stop(self) -> None:
-        self._stopped = True
+        # Ядро проверяет событие перед каждым запросом и прерывает паузы
+        core.stop_event.set()
+
+    def _on_progress(self, event: str, amount: int) -> None:
+        self.progress.emit(self._row, event, amount)
 
     def run(self) -> None:
-        logger = StreamToSignal(self.log)
         old_stdout = sys.stdout
         old_stderr = sys.stderr
-        sys.stdout = logger
-        sys.stderr = logger
+        sys.stdout = self.log_buffer
+        sys.stderr = self.log_buffer
+        core.progress_hook = self._on_progress
+        report: Optional[core.RunReport] = None
 
         try:
             try:
@@ -76,19 +191,36 @@ class Worker(QThread):
                 self.error.emit("Список сообществ пуст.")
                 return
 
-            for comm in self.communities:
-                if self._stopped:
-                    self.log.emit("\nОперация остановлена пользователем.\n")
+            report = core.RunReport(self.old_link, self.new_link)
+            for row, comm in enumerate(self.communities):
+                if core.stop_event.is_set():
+                    print("\nОперация остановлена пользователем.")
                     break
+                self._row = row
+                self.status.emit(row, "в работе")
                 try:
-                    core.process_community(comm, self.old_link, self.new_link)
+                    core.process_community(comm, self.old_link, self.new_link, report.add_community(comm))
+                    self.status.emit(row, "готово")
+                except core.OperationStopped:
+                    self.status.emit(row, "остановлено")
+                    print("\nОперация остановлена пользователем.")
+                    break
                 except Exception as e:
+                    self.status.emit(row, "ошибка")
                     self.error.emit(f"Ошибка при обработке {comm}: {e}")
-
-            self.finished.emit()
         finally:
+            if report is not None:
+                report.finish()
+                try:
+                    json_path, csv_path = report.save()
+                    print(f"\nОтчёт сохранён: {json_path}, {csv_path}")
+                except OSError as e:
+                    print(f"\nНе удалось сохранить отчёт в {core.REPORT_DIR}: {e}")
+            core.progress_hook = None
             sys.stdout = old_stdout
             sys.stderr = old_stderr
+            # В том числе после ошибки инициализации: GUI останавливает таймер лога и включает кнопки
+            self.finished.emit()
 
 
 class MainWindow(QMainWindow):
@@ -97,9 +229,16 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("VK Link Rewriter")
 
         self.worker: Optional[Worker] = None
+        self.log_buffer = LogBuffer()
+        self.progress_model = CommunityProgressModel(self)
 
         self._init_ui()
 
+        # Лог отрисовывается пачками по таймеру, а не на каждый print()
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_timer.timeout.connect(self.flush_log)
+
     def _init_ui(self) -> None:
         central = QWidget()
         self.setCentralWidget(central)
@@ -136,19 +275,41 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(self.stop_btn)
         layout.addLayout(btn_layout)
 
+        # Прогресс по сообществам
+        layout.addWidget(QLabel("Прогресс:"))
+        self.progress_view = QTableView()
+        self.progress_view.setModel(self.progress_model)
+        self.progress_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.progress_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.progress_view)
+
         # Лог
         layout.addWidget(QLabel("Лог:"))
-        self.log_view = QTextEdit()
+        self.log_view = QPlainTextEdit()
         self.log_view.setReadOnly(True)
+        self.log_view.setUndoRedoEnabled(False)
+        self.log_view.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
         layout.addWidget(self.log_view)
 
         self.start_btn.clicked.connect(self.on_start_clicked)
         self.stop_btn.clicked.connect(self.on_stop_clicked)
 
     def append_log(self, text: str) -> None:
-        self.log_view.moveCursor(self.log_view.textCursor().MoveOperation.End)
-        self.log_view.insertPlainText(text)
-        self.log_view.moveCursor(self.log_view.textCursor().MoveOperation.End)
+        self.log_buffer.write(text)
+
+    def flush_log(self) -> None:
+        text = self.log_buffer.drain()
+        if not text:
+            return
+        scrollbar = self.log_view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+
+        cursor = QTextCursor(self.log_view.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
 
     def on_start_clicked(self) -> None:
         if self.worker and self.worker.isRunning():
@@ -173,17 +334,23 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Укажите хотя бы одно сообщество.")
             return
 
+        self.log_buffer.drain()
         self.log_view.clear()
         self.append_log("Начало обработки...\n")
+        self.progress_model.reset(communities)
 
-        self.worker = Worker(token, old_link, new_link, communities)
-        self.worker.log.connect(self.append_log)
+        self.worker = Worker(token, old_link, new_link, communities, self.log_buffer)
+        self.worker.progress.connect(self.progress_model.add_event)
+        self.worker.status.connect(self.progress_model.set_status)
         self.worker.error.connect(self.on_worker_error)
         self.worker.finished.connect(self.on_worker_finished)
 
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
 
+        # Сбрасываем до старта потока, чтобы не потерять ранний клик «Остановить»
+        core.stop_event.clear()
+        self.log_timer.start()
         self.worker.start()
 
     def on_stop_clicked(self) -> None:
@@ -197,6 +364,8 @@ class MainWindow(QMainWindow):
 
     def on_worker_finished(self) -> None:
         self.append_log("\nГотово.\n")
+        self.log_timer.stop()
+        self.flush_log()
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
 
@@ -2,75 +2,564 @@ import os
 import time
 import re
 import sys
+import csv
+import hashlib
+import io
+import json
+import threading
+import weakref
+from datetime import datetime
 from urllib.parse import urlparse
-from typing import Optional
-from collections import deque
+from typing import Callable, Optional
+from collections import OrderedDict, deque
 
 import vk_api
 from vk_api.exceptions import ApiError
 from vk_api.vk_api import DEFAULT_USERAGENT
 from dotenv import load_dotenv
 import requests
-from requests.adapters import HTTPAdapter
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3.util import make_headers
 try:
     from urllib3.util.retry import Retry
 except Exception:  # pragma: no cover
     Retry = None
+try:
+    import httpx  # опционально, для HTTP/2 (нужен также пакет h2)
+except Exception:  # pragma: no cover
+    httpx = None
 
 # Загружаем переменные окружения из файла .env (если есть)
 load_dotenv()
 
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Читает целое из переменной окружения; при ошибке — default с предупреждением."""
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        print(f"⚠️  {name}={raw!r} не является числом, используется {default}")
+        return default
+    if value < minimum:
+        print(f"⚠️  {name}={value} меньше {minimum}, используется {minimum}")
+        return minimum
+    return value
+
+
 # Конфигурация
 VK_TOKEN: Optional[str] = os.getenv("VK_TOKEN")
+REPORT_DIR: str = os.getenv("VK_REPORT_DIR", "reports")
+HTTP_POOL_SIZE: int = _env_int("VK_HTTP_POOL_SIZE", 10)
+HTTP_SESSION_CACHE_SIZE = 4
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_AFTER_MAX = 30.0
+# Накопительные счётчики из get_transport_stats()
+TRANSPORT_COUNTERS = (
+    "requests",
+    "connections_opened",
+    "connections_reused",
+    "compressed_responses",
+    "status_retries",
+)
+HTTP2_ENABLED: bool = os.getenv("VK_HTTP2", "").strip().lower() in ("1", "true", "yes")
 
 vk_session: Optional[vk_api.VkApi] = None
 vk = None
+# Взята ли HTTP-сессия последним init_vk_api из кэша (keep-alive между задачами)
+http_session_reused = False
 
 request_times = deque()
 
-def _build_http_session(
+# Остановка и прогресс для внешних оболочек (GUI, API)
+stop_event = threading.Event()
+progress_hook: Optional[Callable[[str, int], None]] = None
+
+
+class OperationStopped(Exception):
+    """Обработка прервана по запросу пользователя (stop_event)."""
+
+
+PROGRESS_EVENTS = (
+    "post_scanned",
+    "comment_scanned",
+    "post_edited",
+    "comment_edited",
+    "edit_failed",
+    "fetch_failed",
+    "rate_limit_wait",
+)
+
+
+class CommunityStats:
+    """Статистика обработки одного сообщества для отчёта о запуске."""
+
+    def __init__(self, community: str) -> None:
+        self.community = community
+        self.owner_id: Optional[int] = None
+        self.status = "pending"
+        self.duration = 0.0
+        # Число вызовов API по методам (включая повторы)
+        self.requests: dict[str, int] = {}
+        # Время в секундах: fetch/edit — вызовы API, sleep — ожидания в safe_request,
+        # pause — фиксированные паузы между объектами
+        self.timings: dict[str, float] = {"fetch": 0.0, "edit": 0.0, "sleep": 0.0, "pause": 0.0}
+        self.counters: dict[str, int] = {event: 0 for event in PROGRESS_EVENTS}
+
+    def to_dict(self) -> dict:
+        # Отчёт может читаться из другого потока во время обработки: dict() копирует
+        # словарь атомарно под GIL, а итерация по нему в процессе вставки упала бы
+        requests_by_method = dict(self.requests)
+        timings = dict(self.timings)
+        return {
+            "community": self.community,
+            "owner_id": self.owner_id,
+            "status": self.status,
+            "duration": round(self.duration, 3),
+            "requests_total": sum(requests_by_method.values()),
+            "requests": dict(sorted(requests_by_method.items())),
+            "timings": {kind: round(value, 3) for kind, value in timings.items()},
+            "posts_scanned": self.counters["post_scanned"],
+            "comments_scanned": self.counters["comment_scanned"],
+            "posts_edited": self.counters["post_edited"],
+            "comments_edited": self.counters["comment_edited"],
+            "edit_failures": self.counters["edit_failed"],
+            "fetch_failures": self.counters["fetch_failed"],
+            "rate_limit_waits": self.counters["rate_limit_wait"],
+        }
+
+
+class RunReport:
+    """Отчёт о запуске: сводка по всем сообществам, экспорт в JSON и CSV."""
+
+    CSV_FIELDS = (
+        "community",
+        "owner_id",
+        "status",
+        "duration",
+        "requests_total",
+        "fetch_time",
+        "edit_time",
+        "sleep_time",
+        "pause_time",
+        "posts_scanned",
+        "comments_scanned",
+        "posts_edited",
+        "comments_edited",
+        "edit_failures",
+        "fetch_failures",
+        "rate_limit_waits",
+    )
+
+    TOTAL_FIELDS = (
+        "requests_total",
+        "posts_scanned",
+        "comments_scanned",
+        "posts_edited",
+        "comments_edited",
+        "edit_failures",
+        "fetch_failures",
+        "rate_limit_waits",
+    )
+
+    def __init__(self, old_link: str, new_link: str) -> None:
+        self.old_link = old_link
+        self.new_link = new_link
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.communities: list[CommunityStats] = []
+        # Счётчики транспорта общие на процесс: в отчёт идёт разница за запуск
+        # Сессия берётся в init_vk_api до создания отчёта, поэтому её переиспользование
+        # фиксируется флагом, а не разницей счётчиков
+        self._transport_before = get_transport_stats()
+        self._session_reused = http_session_reused
+        self.transport: Optional[dict] = None
+
+    def add_community(self, community: str) -> CommunityStats:
+        stats = CommunityStats(community)
+        self.communities.append(stats)
+        return stats
+
+    def finish(self) -> None:
+        self.finished_at = datetime.now()
+        self.transport = _transport_delta(self._transport_before, get_transport_stats())
+        self.transport["session_reused"] = self._session_reused
+
+    def to_dict(self) -> dict:
+        communities = [stats.to_dict() for stats in list(self.communities)]
+        totals = {key: sum(item[key] for item in communities) for key in self.TOTAL_FIELDS}
+        end = self.finished_at or datetime.now()
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "duration": round((end - self.started_at).total_seconds(), 3),
+            "old_link": self.old_link,
+            "new_link": self.new_link,
+            "totals": totals,
+            "communities": communities,
+            "transport": self.transport,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_csv(self) -> str:
+        """Одна строка на сообщество; вызовы по методам — колонки requests:<метод>."""
+        items = [stats.to_dict() for stats in list(self.communities)]
+        methods = sorted({method for item in items for method in item["requests"]})
+        fieldnames = list(self.CSV_FIELDS) + [f"requests:{method}" for method in methods]
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        for item in items:
+            row = {field: item.get(field) for field in self.CSV_FIELDS}
+            for kind, value in item["timings"].items():
+                row[f"{kind}_time"] = value
+            for method in methods:
+                row[f"requests:{method}"] = item["requests"].get(method, 0)
+            writer.writerow(row)
+        return buffer.getvalue()
+
+    def save(self, directory: str = REPORT_DIR) -> tuple[str, str]:
+        """Записывает отчёт в directory, возвращает пути к JSON и CSV."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"report_{self.started_at:%Y%m%d_%H%M%S}")
+        json_path, csv_path = f"{base}.json", f"{base}.csv"
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            f.write(self.to_csv())
+        return json_path, csv_path
+
+
+def _transport_delta(before: dict, after: dict) -> dict:
+    """Статистика транспорта за период: счётчики — разностью, настройки — как есть."""
+    delta = {key: after[key] for key in ("pool_size", "http2", "transport") if key in after}
+    for key in TRANSPORT_COUNTERS:
+        if key in after:
+            delta[key] = after[key] - before.get(key, 0)
+    if "requests_by_protocol" in after:
+        previous = before.get("requests_by_protocol", {})
+        delta["requests_by_protocol"] = {
+            protocol: count - previous.get(protocol, 0)
+            for protocol, count in after["requests_by_protocol"].items()
+            if count - previous.get(protocol, 0)
+        }
+    return delta
+
+
+# Статистика сообщества, которое обрабатывается сейчас
+current_stats: Optional[CommunityStats] = None
+
+
+def _report(event: str, amount: int = 1) -> None:
+    """Сообщает о событии прогресса (одно из PROGRESS_EVENTS)."""
+    if current_stats is not None:
+        current_stats.counters[event] += amount
+    if progress_hook is not None:
+        progress_hook(event, amount)
+
+
+def _sleep(seconds: float, kind: str = "pause") -> None:
+    """Пауза, которую можно прервать через stop_event."""
+    started = time.monotonic()
+    try:
+        if stop_event.wait(seconds):
+            raise OperationStopped("Операция остановлена пользователем.")
+    finally:
+        if current_stats is not None:
+            current_stats.timings[kind] += time.monotonic() - started
+
+
+class TransportAdapter(HTTPAdapter):
+    """HTTPAdapter с таймаутом по умолчанию и статистикой соединений."""
+
+    def __init__(self, timeout: tuple[float, float], pool_size: int, **kwargs) -> None:
+        self.timeout = timeout
+        self._stats_lock = threading.Lock()
+        self.compressed_responses = 0
+        super().__init__(pool_maxsize=pool_size, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        response = super().send(request, timeout=timeout, **kwargs)
+        if response.headers.get("Content-Encoding"):
+            with self._stats_lock:
+                self.compressed_responses += 1
+        return response
+
+    def stats(self) -> dict:
+        pools = []
+        # RecentlyUsedContainer не поддерживает итерацию, только keys()
+        for key in self.poolmanager.pools.keys():
+            pool = self.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "requests": pool.num_requests,
+                "connections_opened": pool.num_connections,
+                # очередь пула заполнена None-заглушками, живые соединения — остальные
+                "idle_connections": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0,
+            })
+        requests_total = sum(item["requests"] for item in pools)
+        opened = sum(item["connections_opened"] for item in pools)
+        return {
+            "transport": "urllib3",
+            "requests": requests_total,
+            "connections_opened": opened,
+            "connections_reused": max(requests_total - opened, 0),
+            "compressed_responses": self.compressed_responses,
+            "pools": pools,
+        }
+
+
+class Http2Adapter(BaseAdapter):
+    """Транспорт для requests поверх httpx с поддержкой HTTP/2.
+
+    Повторы по RETRY_STATUSES с экспоненциальной паузой повторяют политику
+    urllib3 Retry из HTTP/1.1-транспорта.
+    """
+
+    def __init__(
+        self,
+        timeout: tuple[float, float],
+        pool_size: int,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+    ) -> None:
+        super().__init__()
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._stats_lock = threading.Lock()
+        # Клиент на каждую комбинацию (verify, cert, proxy); обычно он один
+        self._clients: dict[tuple, "httpx.Client"] = {}
+        self._streams: "weakref.WeakSet" = weakref.WeakSet()
+        self.requests_by_protocol: dict[str, int] = {}
+        self.connections_opened = 0
+        self.compressed_responses = 0
+        self.status_retries = 0
+        # ImportError сразу, если не установлен пакет h2
+        self._client_for(True, None, None)
+
+    def _client_for(self, verify, cert, proxy) -> "httpx.Client":
+        key = (verify, cert, proxy)
+        with self._stats_lock:
+            client = self._clients.get(key)
+            if client is None:
+                transport = httpx.HTTPTransport(
+                    http2=True,
+                    verify=verify,
+                    cert=cert,
+                    proxy=proxy,
+                    retries=self.retries,  # только ошибки соединения
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                )
+                # Прокси и переменные окружения уже учтены requests
+                client = self._clients[key] = httpx.Client(transport=transport, trust_env=False)
+            return client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if timeout is None:
+            timeout = self.timeout
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        client = self._client_for(verify, cert, select_proxy(request.url, proxies or {}))
+
+        for attempt in range(self.retries + 1):
+            try:
+                resp = client.request(
+                    request.method,
+                    request.url,
+                    headers=dict(request.headers),
+                    content=request.body,
+                    timeout=httpx.Timeout(read, connect=connect),
+                )
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(e, request=request)
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(e, request=request)
+
+            self._record(resp)
+            if resp.status_code not in RETRY_STATUSES or attempt == self.retries:
+                break
+            retry_after = resp.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else self.backoff_factor * (2 ** attempt)
+            with self._stats_lock:
+                self.status_retries += 1
+            if stop_event.wait(min(delay, RETRY_AFTER_MAX)):
+                raise OperationStopped("Операция остановлена пользователем.")
+
+        response = requests.Response()
+        response.status_code = resp.status_code
+        response.reason = resp.reason_phrase
+        # httpx уже распаковал тело, поэтому Content-Encoding и Content-Length сжатого тела не передаём
+        response.headers = CaseInsensitiveDict(
+            (name, value) for name, value in resp.headers.items()
+            if name.lower() not in ("content-encoding", "content-length")
+        )
+        # Тело прочитано целиком: iter_content() и stream=True работают по _content
+        response._content = resp.content
+        response._content_consumed = True
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def _record(self, resp) -> None:
+        stream = resp.extensions.get("network_stream")
+        with self._stats_lock:
+            self.requests_by_protocol[resp.http_version] = self.requests_by_protocol.get(resp.http_version, 0) + 1
+            if resp.headers.get("Content-Encoding"):
+                self.compressed_responses += 1
+            # Новый сетевой поток — новое соединение; WeakSet не путает его с закрытыми
+            if stream is not None and stream not in self._streams:
+                self._streams.add(stream)
+                self.connections_opened += 1
+
+    def close(self) -> None:
+        with self._stats_lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            requests_total = sum(self.requests_by_protocol.values())
+            stats = {
+                "transport": "httpx",
+                "requests": requests_total,
+                "requests_by_protocol": dict(self.requests_by_protocol),
+                "connections_opened": self.connections_opened,
+                "connections_reused": max(requests_total - self.connections_opened, 0),
+                "compressed_responses": self.compressed_responses,
+                "status_retries": self.status_retries,
+            }
+            # Простаивающие соединения видны только через внутренности httpx/httpcore,
+            # поэтому считаем их по возможности и пропускаем поле при несовпадении версии
+            try:
+                stats["idle_connections"] = sum(
+                    1
+                    for client in self._clients.values()
+                    for conn in client._transport._pool.connections
+                    if conn.is_idle()
+                )
+            except Exception:
+                pass
+            return stats
+
+
+# Общий транспорт (пул соединений) и сессии последних токенов, переиспользуемые между задачами.
+# Ключ — хеш токена, сам токен в кэше не хранится.
+_transport_lock = threading.RLock()
+_transport = None
+_http_sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+_http_session_reuses = 0
+
+
+def _build_transport(
     timeout: tuple[float, float] = (10.0, 60.0),
     retries: int = 3,
     backoff_factor: float = 0.5,
-) -> requests.Session:
-    session = requests.Session()
-    session.headers.setdefault("User-agent", DEFAULT_USERAGENT)
+    pool_size: int = HTTP_POOL_SIZE,
+    http2: bool = HTTP2_ENABLED,
+):
+    if http2:
+        if httpx is None:
+            print("⚠️  HTTP/2 недоступен: установите httpx[http2]. Используется HTTP/1.1.")
+        else:
+            try:
+                return Http2Adapter(timeout, pool_size, retries, backoff_factor)
+            except ImportError as e:
+                print(f"⚠️  HTTP/2 недоступен ({e}). Используется HTTP/1.1.")
 
+    max_retries = 0
     if Retry is not None:
-        retry = Retry(
+        max_retries = Retry(
             total=retries,
             connect=retries,
             read=retries,
             status=retries,
             backoff_factor=backoff_factor,
-            status_forcelist=(429, 500, 502, 503, 504),
+            status_forcelist=RETRY_STATUSES,
             allowed_methods=frozenset({"GET", "POST"}),
             raise_on_status=False,
         )
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
+    return TransportAdapter(timeout, pool_size, max_retries=max_retries)
+
 
-    original_request = session.request
+def _get_transport():
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = _build_transport()
+        return _transport
 
-    def request_with_timeout(method, url, **kwargs):
-        if kwargs.get("timeout") is None:
-            kwargs["timeout"] = timeout
-        return original_request(method, url, **kwargs)
 
-    session.request = request_with_timeout  # type: ignore[assignment]
+def _build_http_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.setdefault("User-agent", DEFAULT_USERAGENT)
+    # gzip/deflate (и br, если установлен brotli) — ответы API хорошо сжимаются
+    session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+
+    transport = _get_transport()
+    session.mount("https://", transport)
+    session.mount("http://", transport)
     return session
 
 
+def _get_http_session(token: str) -> tuple[requests.Session, bool]:
+    """Возвращает HTTP-сессию для токена и признак того, что она взята из кэша."""
+    global _http_session_reuses
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    with _transport_lock:
+        session = _http_sessions.get(key)
+        reused = session is not None
+        if session is None:
+            session = _http_sessions[key] = _build_http_session()
+            # Вытесняем давно не использованные сессии. close() не вызываем:
+            # он закрыл бы общий транспорт, смонтированный во все сессии.
+            while len(_http_sessions) > HTTP_SESSION_CACHE_SIZE:
+                _http_sessions.popitem(last=False)
+        else:
+            _http_sessions.move_to_end(key)
+            _http_session_reuses += 1
+        return session, reused
+
+
+def get_transport_stats() -> dict:
+    """Статистика общего транспорта: пул, соединения, переиспользование сессий."""
+    with _transport_lock:
+        stats = {
+            "pool_size": HTTP_POOL_SIZE,
+            "http2": isinstance(_transport, Http2Adapter),
+            "sessions": len(_http_sessions),
+            "session_reuses": _http_session_reuses,
+        }
+        if _transport is not None:
+            stats.update(_transport.stats())
+        return stats
+
+
 def init_vk_api(token: Optional[str] = None, ignore_env_token: bool = False) -> None:
     """
     Инициализирует VK API по токену.
     Если токен не передан и ignore_env_token=False, используется VK_TOKEN из .env.
+    HTTP-сессия для токена переиспользуется между вызовами (keep-alive).
     """
-    global VK_TOKEN, vk_session, vk
+    global VK_TOKEN, vk_session, vk, http_session_reused
 
     token_arg = (token or "").strip() or None
-    http_session = _build_http_session()
 
     if token_arg:
         VK_TOKEN = token_arg
@@ -79,10 +568,26 @@ def init_vk_api(token: Optional[str] = None, ignore_env_token: bool = False) ->
     else:
         raise RuntimeError("Укажите VK токен (или задайте VK_TOKEN в .env).")
 
+    http_session, http_session_reused = _get_http_session(VK_TOKEN)
     vk_session = vk_api.VkApi(token=VK_TOKEN, session=http_session)
+    # Ошибку 6 обрабатывает safe_request: встроенный обработчик vk_api повторяет запрос
+    # рекурсивно через time.sleep, мимо stop_event и учёта ожиданий
+    vk_session.error_handlers.pop(6, None)
     vk = vk_session.get_api()
 
 
+def _timed_method(method, params):
+    """Вызывает метод API и учитывает время вызова в статистике сообщества."""
+    started = time.monotonic()
+    try:
+        return vk_session.method(method, params)
+    finally:
+        if current_stats is not None:
+            current_stats.requests[method] = current_stats.requests.get(method, 0) + 1
+            kind = "edit" if method.startswith("wall.edit") else "fetch"
+            current_stats.timings[kind] += time.monotonic() - started
+
+
 # Вспомогательная функция для безопасного ожидания при превышении лимитов
 def safe_request(method, **kwargs):
     """Выполняет запрос к API, автоматически повторяет при ошибке 6 (слишком много запросов)."""
@@ -93,6 +598,9 @@ def safe_request(method, **kwargs):
     delay = 0.34  # начальная задержка ~3 запроса в секунду
     net_delay = 1.0
     while True:
+        if stop_event.is_set():
+            raise OperationStopped("Операция остановлена пользователем.")
+
         current_time = time.time()
         # Удаляем старые запросы старше 60 секунд
         while request_times and request_times[0] < current_time - 60:
@@ -102,7 +610,8 @@ def safe_request(method, **kwargs):
             # Ждём, пока самый старый запрос выйдет за пределы окна
             sleep_time = (request_times[0] - (current_time - 60)) + 0.01  # небольшой буфер
             print(f"⚠️  Достигнут лимит 180 запросов/мин, пауза {sleep_time:.2f} сек...")
-            time.sleep(sleep_time)
+            _report("rate_limit_wait")
+            _sleep(sleep_time, "sleep")
             current_time = time.time()
             # Повторно удаляем старые после сна
             while request_times and request_times[0] < current_time - 60:
@@ -113,11 +622,12 @@ def safe_request(method, **kwargs):
 
         try:
             # Правильный вызов через vk_session.method
-            return vk_session.method(method, kwargs)
+            return _timed_method(method, kwargs)
         except ApiError as e:
             if e.code == 6:  # Too many requests per second
                 print(f"⚠️  Превышение лимита запросов, пауза {delay:.2f} сек...")
-                time.sleep(delay)
+                _report("rate_limit_wait")
+                _sleep(delay, "sleep")
                 delay *= 2  # экспоненциальное увеличение паузы
                 if delay > 10:
                     delay = 10
@@ -125,7 +635,7 @@ def safe_request(method, **kwargs):
                 raise e
         except requests.exceptions.RequestException as e:
             print(f"⚠️  Сетевая ошибка при вызове {method}: {e}. Повтор через {net_delay:.1f} сек...")
-            time.sleep(net_delay)
+            _sleep(net_delay, "sleep")
             net_delay = min(net_delay * 2, 20.0)
 
 def resolve_owner_id(screen_name):
@@ -171,6 +681,7 @@ def resolve_owner_id(screen_name):
             return None
     except ApiError as e:
         print(f"⚠️  Ошибка при разрешении имени {screen_name}: {e}")
+        _report("fetch_failed")
         return None
 
 def replace_in_text(text, old, new):
@@ -215,13 +726,40 @@ def edit_comment(owner_id, comment_id, new_text, attachments=None):
         print(f"    ❌ Ошибка редактирования комментария {comment_id}: {e}")
         return False
 
-def process_community(community_url, old_link, new_link):
-    """Обрабатывает одно сообщество: ищет посты и комментарии, заменяет ссылки."""
+def process_community(community_url, old_link, new_link, stats: Optional[CommunityStats] = None) -> CommunityStats:
+    """Обрабатывает одно сообщество: ищет посты и комментарии, заменяет ссылки.
+
+    Возвращает статистику сообщества (stats, если передан, иначе новый объект).
+    """
+    global current_stats
+    if stats is None:
+        stats = CommunityStats(community_url)
+
+    previous_stats, current_stats = current_stats, stats
+    stats.status = "running"
+    started = time.monotonic()
+    try:
+        _process_community(community_url, old_link, new_link, stats)
+    except OperationStopped:
+        stats.status = "stopped"
+        raise
+    except Exception:
+        stats.status = "error"
+        raise
+    finally:
+        stats.duration += time.monotonic() - started
+        current_stats = previous_stats
+    return stats
+
+def _process_community(community_url, old_link, new_link, stats):
     owner_id = resolve_owner_id(community_url)
     if owner_id is None:
         print(f"❌ Пропускаем {community_url}: не удалось определить ID")
+        stats.status = "skipped"
         return
 
+    stats.owner_id = owner_id
+
     print(f"\n📌 Обрабатываем сообщество ID = {owner_id}")
 
     # 1. Поиск постов, содержащих старую ссылку
@@ -242,18 +780,21 @@ def process_community(community_url, old_link, new_link):
                     break
             else:
                 print(f"  ⚠️ Неожиданный ответ от wall.get: {posts_response}")
+                _report("fetch_failed")
                 break
     
         except ApiError as e:
             error_code = getattr(e, 'code', 'неизвестный')
             error_msg = getattr(e, 'message', str(e))
             print(f"❌ Ошибка при получении постов в {owner_id}: код {error_code}, сообщение: {error_msg}")
+            _report("fetch_failed")
             if error_code in [15, 30, 100, 1051]:  # Добавьте 1051 для обработки
                 print(f"   Сообщество {owner_id} недоступно (возможно, нет прав или тип профиля).")
             break
     
         for post in items:
             post_id = post['id']
+            _report("post_scanned")
             text = post.get('text', '')
             new_text = replace_in_text(text, old_link, new_link)
             if new_text != text:
@@ -261,10 +802,13 @@ def process_community(community_url, old_link, new_link):
                 print(f"  ✏️  Редактируем пост {post_id}...")
                 if edit_post(owner_id, post_id, new_text, attachments):
                     total_edited_posts += 1
+                    _report("post_edited")
+                else:
+                    _report("edit_failed")
             else:
                 print(f"  ⏭️  Пост {post_id} – текст не изменился, пропускаем")
 
-            time.sleep(0.34)
+            _sleep(0.34)
     
             # Комментарии для всех постов
             process_comments_for_post(owner_id, post_id, old_link, new_link)
@@ -272,12 +816,15 @@ def process_community(community_url, old_link, new_link):
         if len(items) < 100:
             break
         offset += 100
-        time.sleep(0.34)
+        _sleep(0.34)
     
     print(f"  ✅ Всего отредактировано постов: {total_edited_posts}")
+    print(f"  ✅ Всего отредактировано комментариев: {stats.counters['comment_edited']}")
+    stats.status = "done"
 
 def process_comment(owner_id, comment, old_link, new_link):
     comment_id = comment['id']
+    _report("comment_scanned")
     text = comment.get('text', '')
     if old_link not in text:
         return 0
@@ -289,7 +836,9 @@ def process_comment(owner_id, comment, old_link, new_link):
     attachments = comment.get('attachments', [])
     print(f"    ✏️  Редактируем комментарий {comment_id}...")
     if edit_comment(owner_id, comment_id, new_text, attachments):
+        _report("comment_edited")
         return 1
+    _report("edit_failed")
     return 0
 
 def process_comments_for_post(owner_id, post_id, old_link, new_link):
@@ -308,6 +857,7 @@ def process_comments_for_post(owner_id, post_id, old_link, new_link):
                                     thread_items=10)
         except ApiError as e:
             print(f"    ⚠️  Не удалось получить комментарии к посту {post_id}: {e}")
+            _report("fetch_failed")
             break
 
         items = comments.get('items', [])
@@ -316,18 +866,18 @@ def process_comments_for_post(owner_id, post_id, old_link, new_link):
 
         for comment in items:
             total_edited_comments += process_comment(owner_id, comment, old_link, new_link)
-            time.sleep(0.34)
+            _sleep(0.34)
 
             if 'thread' in comment:
                 thread_items = comment['thread'].get('items', [])
                 for thread_comment in thread_items:
                     total_edited_comments += process_comment(owner_id, thread_comment, old_link, new_link)
-                    time.sleep(0.34)
+                    _sleep(0.34)
 
         if len(items) < 100:
             break
         offset += 100
-        time.sleep(0.34)
+        _sleep(0.34)
 
     if total_edited_comments:
         print(f"    ✅ Комментариев отредактировано: {total_edited_comments}")
@@ -360,10 +910,19 @@ def main():
         return
 
     print(f"\n🔍 Начинаем обработку {len(communities)} сообществ...")
-    for comm in communities:
-        process_community(comm, old_link, new_link)
-        # Пауза между сообществами
-        time.sleep(1)
+    report = RunReport(old_link, new_link)
+    try:
+        for comm in communities:
+            process_community(comm, old_link, new_link, report.add_community(comm))
+            # Пауза между сообществами
+            _sleep(1)
+    finally:
+        report.finish()
+        try:
+            json_path, csv_path = report.save()
+            print(f"\n📊 Отчёт сохранён: {json_path}, {csv_path}")
+        except OSError as e:
+            print(f"\n⚠️  Не удалось сохранить отчёт в {REPORT_DIR}: {e}")
 
     print("\n🎉 Работа завершена!")
 